@@ -3,27 +3,283 @@
 from __future__ import annotations
 
 import base64
+import binascii
+import bisect
+import fnmatch
+import functools
+import importlib
 import json
+import posixpath
 import re
-from dataclasses import dataclass, field
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Self
 
 import gitlab
+import requests
 from gitlab.v4.objects import Project
+from requests.adapters import DEFAULT_POOLSIZE, DEFAULT_RETRIES, HTTPAdapter
 
+from agent.scanners.scan_cache import ScanCache
 
-@dataclass
+
+def _optional_import(name: str) -> Any:
+    """Import an optional accelerator module, or return None when it isn't installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+
+# Optional multi-pattern engines — search_many falls back to stdlib re without them
+hyperscan = _optional_import("hyperscan")
+re2 = _optional_import("re2")
+ahocorasick = _optional_import("ahocorasick")
+
+# Binary/build artifacts — a tuple so str.endswith checks every suffix in one call
+_SKIP_EXT: tuple[str, ...] = (
+    ".png", ".jpg", ".gif", ".ico", ".woff", ".ttf", ".eot", ".svg",
+    ".min.js", ".min.css", ".lock", ".sum", ".mod",
+)
+
+
+def _re2_options(case_sensitive: bool = True) -> Any:
+    """RE2 options that report unsupported patterns only via re2.error, not stderr."""
+    options = re2.Options()
+    options.log_errors = False
+    options.case_sensitive = case_sensitive
+    return options
+
+
+@functools.lru_cache(maxsize=512)
+def _compile(pattern: str | bytes, flags: int) -> Any:
+    """Compile a str/bytes regex once, with RE2 (linear time) unless it rejects the pattern."""
+    if re2 is not None:
+        inline = ("i" if flags & re.IGNORECASE else "") + ("m" if flags & re.MULTILINE else "")
+        if inline:
+            prefix = f"(?{inline})"
+            pattern = prefix.encode() + pattern if isinstance(pattern, bytes) else prefix + pattern
+        try:
+            return re2.compile(pattern, options=_re2_options())
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
+
+
+# ASCII line terminators as str.splitlines() sees them (it also splits on \f, \v
+# and \x1c-\x1e, which bytes.splitlines() does not)
+_LINE_BREAK_RE = re.compile(rb"\r\n|[\n\r\v\f\x1c-\x1e]")
+
+# Constructs that look past the current line: lookarounds and \A / \Z / \z anchors
+_LINE_PEEK_RE = re.compile(rb"\(\?<?[=!]|\\[AZz]")
+
+
+def _needs_line_mode(pattern: bytes) -> bool:
+    """True if a pattern can see past its line, so whole-file search can't stand in for it."""
+    return _LINE_PEEK_RE.search(pattern) is not None
+
+
+def _build_automaton(category: str, keywords: tuple[str, ...], weight: float) -> Any:
+    """Build an Aho–Corasick automaton over keywords, or None without pyahocorasick."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, (category, weight))
+    automaton.make_automaton()
+    return automaton
+
+
+def _keyword_weight(
+    path_lower: str, automaton: Any, keywords: tuple[str, ...], weight: float,
+) -> float:
+    """Return weight if any keyword occurs in the path (counted once per category)."""
+    if automaton is not None:
+        for _, (_category, w) in automaton.iter(path_lower):
+            return float(w)
+        return 0.0
+    return weight if any(keyword in path_lower for keyword in keywords) else 0.0
+
+
+def _priority_regex(entries: list[str]) -> re.Pattern[str]:
+    """Compile priority entries into one union regex, one capture group per entry.
+
+    Entries ending in "/" match anything under that directory. The entries are
+    disjoint, so the matching group's index identifies the single entry hit.
+    """
+    alternatives = (fnmatch.translate(e + "*" if e.endswith("/") else e) for e in entries)
+    return re.compile("|".join(f"({alt})" for alt in alternatives))
+
+
+def _file_ext(path: str) -> str:
+    """Lowercased final suffix of a path; a bare dotfile (".env") is its own suffix."""
+    base = posixpath.basename(path)
+    ext = posixpath.splitext(base)[1]
+    if not ext and base.startswith("."):
+        ext = base
+    return ext.lower()
+
+
+def _extension_filter(file_extensions: list[str] | None) -> Callable[[RepoFile], bool] | None:
+    """Build a per-file predicate for a file_extensions argument (None = keep all).
+
+    Single-dot suffixes are checked against the precomputed RepoFile.ext in O(1);
+    anything else (".min.js", "Dockerfile") keeps the str.endswith check.
+    """
+    if not file_extensions:
+        return None
+    simple = [e for e in file_extensions if e.startswith(".") and e.count(".") == 1]
+    wanted = frozenset(e.lower() for e in simple)
+    other = tuple(e for e in file_extensions if e not in simple)
+    if not other:
+        return lambda repo_file: repo_file.ext in wanted
+    return lambda repo_file: repo_file.ext in wanted or repo_file.path.endswith(other)
+
+
+def _is_default_adapter(adapter: Any) -> bool:
+    """True for the HTTPAdapter a fresh requests.Session mounts, with nothing customized."""
+    return (
+        type(adapter) is HTTPAdapter
+        and adapter.poolmanager.connection_pool_kw.get("maxsize") == DEFAULT_POOLSIZE
+        and adapter.max_retries.total == DEFAULT_RETRIES
+    )
+
+
+def _init_fields(obj: Any) -> dict[str, Any]:
+    """Shallow dict of a dataclass's constructor fields (skips derived/index fields)."""
+    return {f.name: getattr(obj, f.name) for f in fields(obj) if f.init}
+
+
+class PathTrie:
+    """Character trie over repo paths: prefix queries cost O(len(prefix)), not O(files)."""
+
+    __slots__ = ("_root", "_size")
+
+    _END = ""  # Terminal marker; never collides with a single path character
+
+    def __init__(self, paths: Iterable[str] = ()) -> None:
+        self._root: dict[str, Any] = {}
+        self._size = 0
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        node = self._root
+        for ch in path:
+            node = node.setdefault(ch, {})
+        if self._END not in node:
+            node[self._END] = True
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, path: str) -> bool:
+        node = self._walk(path)
+        return node is not None and self._END in node
+
+    def has_subtrie(self, prefix: str) -> bool:
+        """True if any stored path starts with prefix."""
+        node = self._walk(prefix)
+        # Nodes only exist on the way to a terminal, so reaching one is enough
+        return node is not None and (bool(prefix) or self._size > 0)
+
+    def _walk(self, prefix: str) -> dict[str, Any] | None:
+        node = self._root
+        for ch in prefix:
+            child: dict[str, Any] | None = node.get(ch)
+            if child is None:
+                return None
+            node = child
+        return node
+
+
+@dataclass(slots=True)
 class RepoFile:
-    """Represents a file in the repository."""
+    """Represents a file in the repository; ``content`` holds the raw bytes."""
 
     path: str
-    content: str
+    content: bytes
     size: int = 0
     last_modified: str = ""
+    # Bit i set when the path matches RepoAnalyzer.PRIORITY_FILES[i]; derived from path
+    priority: int = field(default=0, init=False, repr=False, compare=False)
+    # Lowercased suffix, derived from path; see _file_ext()
+    ext: str = field(default="", init=False, repr=False, compare=False)
+    # True when byte and str regexes agree on content: pure ASCII and no \x1f, which
+    # a str \s matches and a bytes \s does not
+    byte_searchable: bool = field(default=True, init=False, repr=False, compare=False)
+    # Lazily filled by `lines` and the line index properties (slots rule out cached_property)
+    _lines: list[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _line_offsets: list[int] | None = field(default=None, init=False, repr=False, compare=False)
+    _line_ends: list[int] | None = field(default=None, init=False, repr=False, compare=False)
+    _lf_only: bool | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.priority = RepoAnalyzer.priority_of(self.path)
+        self.ext = _file_ext(self.path)
+        self.byte_searchable = self.content.isascii() and b"\x1f" not in self.content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    @property
+    def lines(self) -> list[str]:
+        """Decoded lines as str.splitlines() splits them, for the text search path."""
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    def line_text(self, index: int) -> str:
+        """Decode one line of ASCII content (0-based), leaving the rest as bytes."""
+        return self.content[self.line_offsets[index]:self.line_ends[index]].decode("ascii")
+
+    @property
+    def line_offsets(self) -> list[int]:
+        """Start offset of each line; bisect a match offset here to get its line number."""
+        if self._line_offsets is None:
+            self._line_offsets, self._line_ends, self._lf_only = self._line_index()
+        return self._line_offsets
 
+    @property
+    def line_ends(self) -> list[int]:
+        """End offset of each line, excluding its terminator."""
+        if self._line_ends is None:
+            self._line_offsets, self._line_ends, self._lf_only = self._line_index()
+        return self._line_ends
+
+    @property
+    def lf_only(self) -> bool:
+        """True if every line break is LF, the only one MULTILINE ^/$ recognize."""
+        if self._lf_only is None:
+            self._line_offsets, self._line_ends, self._lf_only = self._line_index()
+        return self._lf_only
 
-@dataclass
+    def _line_index(self) -> tuple[list[int], list[int], bool]:
+        # Same boundaries as str.splitlines() on ASCII: a trailing terminator opens no new line
+        content = self.content
+        size = len(content)
+        starts: list[int] = []
+        ends: list[int] = []
+        lf_only = True
+        pos = 0
+        for m in _LINE_BREAK_RE.finditer(content):
+            start = m.start()
+            starts.append(pos)
+            ends.append(start)
+            pos = m.end()
+            if lf_only and (pos - start != 1 or content[start] != 0x0A):
+                lf_only = False
+        if pos < size:
+            starts.append(pos)
+            ends.append(size)
+        return starts, ends, lf_only
+
+
+@dataclass(slots=True)
 class MergeRequestInfo:
     """Summarized MR data for compliance analysis."""
 
@@ -38,7 +294,50 @@ class MergeRequestInfo:
     target_branch: str
 
 
-@dataclass
+class _TrackedFiles(dict[str, RepoFile]):
+    """RepoSnapshot.files: a dict that flags its owner's path indexes stale on any change."""
+
+    __slots__ = ("dirty",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.dirty = True
+
+    def __setitem__(self, key: str, value: RepoFile) -> None:
+        self.dirty = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.dirty = True
+        super().__delitem__(key)
+
+    # typeshed overloads dict |= and |; one untyped override stands in for both
+    def __ior__(self, other: Any, /) -> Self:  # type: ignore[override,misc]
+        self.dirty = True
+        return super().__ior__(other)
+
+    def pop(self, *args: Any) -> Any:
+        self.dirty = True
+        return super().pop(*args)
+
+    def popitem(self) -> tuple[str, RepoFile]:
+        self.dirty = True
+        return super().popitem()
+
+    def clear(self) -> None:
+        self.dirty = True
+        super().clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self.dirty = True
+        super().update(*args, **kwargs)
+
+    def setdefault(self, *args: Any) -> Any:
+        self.dirty = True
+        return super().setdefault(*args)
+
+
+@dataclass(slots=True)
 class RepoSnapshot:
     """Complete snapshot of a repository for compliance analysis."""
 
@@ -50,38 +349,304 @@ class RepoSnapshot:
     branch_rules: dict[str, Any] = field(default_factory=dict)
     project_settings: dict[str, Any] = field(default_factory=dict)
     scanned_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    # Path indexes for has_file/files_named lookups; rebuilt by index_paths()
+    _path_trie: PathTrie = field(default_factory=PathTrie, init=False, repr=False, compare=False)
+    _basenames: dict[str, list[str]] = field(
+        default_factory=dict, init=False, repr=False, compare=False,
+    )
+    _priority_mask: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.files = _TrackedFiles(self.files)
+
+    def to_json(self) -> str:
+        """Serialize the snapshot for the scan cache (file contents base64-encoded)."""
+        raw = _init_fields(self)
+        raw["files"] = {path: _init_fields(f) for path, f in self.files.items()}
+        raw["recent_mrs"] = [_init_fields(mr) for mr in self.recent_mrs]
+        for f in raw["files"].values():
+            f["content"] = base64.b64encode(f["content"]).decode("ascii")
+        return json.dumps(raw)
+
+    @classmethod
+    def from_json(cls, data: str) -> RepoSnapshot:
+        """Rebuild a snapshot serialized with to_json."""
+        raw = json.loads(data)
+        for f in raw["files"].values():
+            f["content"] = base64.b64decode(f["content"])
+        raw["files"] = {path: RepoFile(**f) for path, f in raw["files"].items()}
+        raw["recent_mrs"] = [MergeRequestInfo(**mr) for mr in raw["recent_mrs"]]
+        snapshot = cls(**raw)
+        snapshot.index_paths()
+        return snapshot
+
+    def index_paths(self) -> None:
+        """Rebuild the path trie and basename index after `files` changes."""
+        if not isinstance(self.files, _TrackedFiles):
+            self.files = _TrackedFiles(self.files)
+        self._path_trie = PathTrie(self.files)
+        basenames: dict[str, list[str]] = {}
+        for path in self.files:
+            basenames.setdefault(posixpath.basename(path), []).append(path)
+        self._basenames = basenames
+        mask = 0
+        for f in self.files.values():
+            mask |= f.priority
+        self._priority_mask = mask
+        self.files.dirty = False
 
     def get_file_content(self, path: str) -> str | None:
-        """Return file content or None if not found."""
+        """Return decoded file content or None if not found."""
         f = self.files.get(path)
-        return f.content if f else None
+        return f.text if f else None
 
     def has_file(self, path: str) -> bool:
-        """Check if a file exists (exact or glob-style)."""
+        """Check if a file exists (exact, glob-style, or a "dir/" prefix)."""
         if path in self.files:
             return True
         # Simple wildcard: check if any file matches pattern
         if "*" in path:
-            prefix = path.split("*")[0]
-            return any(p.startswith(prefix) for p in self.files)
+            return self._has_prefix(path.split("*", 1)[0])
+        if path.endswith("/"):
+            return self._has_prefix(path)
         return False
 
+    def has_priority_file(self, entry: str) -> bool:
+        """Check a RepoAnalyzer.PRIORITY_FILES entry against the precomputed bitmask.
+
+        Raises ValueError for anything that is not a PRIORITY_FILES entry; use
+        has_file() for arbitrary paths and globs.
+        """
+        bit = RepoAnalyzer.PRIORITY_BITS.get(entry)
+        if bit is None:
+            raise ValueError(f"{entry!r} is not a RepoAnalyzer.PRIORITY_FILES entry")
+        self._ensure_indexed()
+        return bool(self._priority_mask & bit)
+
+    def files_named(self, name: str) -> list[str]:
+        """Return every path whose basename is exactly name (e.g. "Dockerfile")."""
+        self._ensure_indexed()
+        return list(self._basenames.get(name, ()))
+
+    def _has_prefix(self, prefix: str) -> bool:
+        """Check the path trie for any entry starting with prefix."""
+        self._ensure_indexed()
+        return self._path_trie.has_subtrie(prefix)
+
+    def _ensure_indexed(self) -> None:
+        files = self.files
+        if not isinstance(files, _TrackedFiles) or files.dirty:
+            # Files changed (or were replaced) since index_paths(); rebuild, don't answer stale
+            self.index_paths()
+
     def search_content(self, pattern: str, file_extensions: list[str] | None = None) -> list[tuple[str, int, str]]:
         """Search for a regex pattern across repo files.
 
         Returns list of (file_path, line_number, line_content).
         """
         results: list[tuple[str, int, str]] = []
-        regex = re.compile(pattern, re.IGNORECASE)
+        keep = _extension_filter(file_extensions)
+        text_search = _compile(pattern, re.IGNORECASE).search
+        search = None
+        line_mode = False
+        if pattern.isascii():
+            raw = pattern.encode()
+            # MULTILINE keeps ^/$ anchored per line now that whole files are searched
+            search = _compile(raw, re.IGNORECASE | re.MULTILINE).search
+            line_mode = _needs_line_mode(raw)
+
         for path, repo_file in self.files.items():
-            if file_extensions:
-                if not any(path.endswith(ext) for ext in file_extensions):
-                    continue
-            for i, line in enumerate(repo_file.content.splitlines(), start=1):
-                if regex.search(line):
-                    results.append((path, i, line.strip()))
+            if keep and not keep(repo_file):
+                continue
+            if search is None or not repo_file.byte_searchable:
+                results.extend(self._search_text_lines(text_search, path, repo_file))
+                continue
+            for line_no in self._matching_lines(search, repo_file, line_mode):
+                results.append((path, line_no, repo_file.line_text(line_no - 1).strip()))
         return results
 
+    @staticmethod
+    def _search_text_lines(
+        search: Callable[[str], Any], path: str, repo_file: RepoFile,
+    ) -> Iterator[tuple[str, int, str]]:
+        """Match a str pattern against each decoded line (non-ASCII pattern or content)."""
+        for i, text in enumerate(repo_file.lines, start=1):
+            if search(text):
+                yield path, i, text.strip()
+
+    @staticmethod
+    def _matching_lines(search: Any, repo_file: RepoFile, line_mode: bool) -> Iterator[int]:
+        """Yield each line number the pattern matches, searching the whole file at once."""
+        content = repo_file.content
+        starts = repo_file.line_offsets
+        ends = repo_file.line_ends
+        # MULTILINE ^/$ only know LF, and lookarounds/\A/\Z see past the line
+        if line_mode or not repo_file.lf_only:
+            for line_no, (start, end) in enumerate(zip(starts, ends), start=1):
+                if search(content[start:end]):
+                    yield line_no
+            return
+
+        bisect_right = bisect.bisect_right
+        last = len(starts) - 1
+        match = search(content) if starts else None
+        while match:
+            i = bisect_right(starts, match.start()) - 1
+            # A match that runs past its line (e.g. via \s) is re-checked on that line alone
+            if match.end() <= ends[i] or search(content[starts[i]:ends[i]]):
+                yield i + 1
+            if i >= last:
+                break
+            # One hit per line: resume at the start of the next line
+            match = search(content, starts[i + 1])
+
+    def search_many(
+        self,
+        patterns: dict[str, str],
+        file_extensions: list[str] | None = None,
+    ) -> dict[str, list[tuple[str, int, str]]]:
+        """Search several regex patterns across repo files in a single pass per file.
+
+        ``patterns`` maps a caller-chosen ID (e.g. a control ID) to a regex.
+        Returns a dict keyed by the same IDs, each holding (file_path, line_number,
+        line_content) tuples in the same shape as ``search_content``.
+        """
+        results: dict[str, list[tuple[str, int, str]]] = {key: [] for key in patterns}
+        if not patterns:
+            return results
+
+        keep = _extension_filter(file_extensions)
+        files = [
+            (path, repo_file)
+            for path, repo_file in self.files.items()
+            if not keep or keep(repo_file)
+        ]
+
+        # Non-ASCII patterns can't be matched as UTF-8 bytes; see _search_text_lines
+        keys = []
+        for key, pattern in patterns.items():
+            if pattern.isascii():
+                keys.append(key)
+                continue
+            text_search = _compile(pattern, re.IGNORECASE).search
+            for path, repo_file in files:
+                results[key].extend(self._search_text_lines(text_search, path, repo_file))
+        if not keys:
+            return results
+
+        db = None
+        searches: list[Any] = []
+        raw = [patterns[key].encode() for key in keys]
+        if hyperscan is not None and not any(map(_needs_line_mode, raw)):
+            db = self._hyperscan_database(keys, patterns)
+        if db is not None:
+            # Hyperscan reports every match; these confirm the ones that cross lines
+            searches = [_compile(p, re.IGNORECASE | re.MULTILINE).search for p in raw]
+
+        match_line = None
+        text_searches = None
+        for path, repo_file in files:
+            if not repo_file.byte_searchable:
+                # Same reason as non-ASCII patterns: only str search reads this file right
+                text_searches = text_searches or [
+                    _compile(patterns[key], re.IGNORECASE).search for key in keys
+                ]
+                for key, text_search in zip(keys, text_searches):
+                    results[key].extend(self._search_text_lines(text_search, path, repo_file))
+            elif db is not None and repo_file.lf_only:
+                self._scan_hyperscan(db, searches, keys, path, repo_file, results)
+            else:
+                match_line = match_line or self._set_matcher(keys, patterns)
+                self._scan_lines(match_line, keys, path, repo_file, results)
+        return results
+
+    @staticmethod
+    def _scan_lines(
+        match_line: Any,
+        keys: list[str],
+        path: str,
+        repo_file: RepoFile,
+        results: dict[str, list[tuple[str, int, str]]],
+    ) -> None:
+        """Match every pattern against each line of one file."""
+        content = repo_file.content
+        bounds = zip(repo_file.line_offsets, repo_file.line_ends)
+        for i, (start, end) in enumerate(bounds):
+            for idx in match_line(content[start:end]):
+                results[keys[idx]].append((path, i + 1, repo_file.line_text(i).strip()))
+
+    @staticmethod
+    def _set_matcher(keys: list[str], patterns: dict[str, str]) -> Any:
+        """Build a callable returning the indices of every pattern matching a line."""
+        if re2 is not None:
+            try:
+                regex_set = re2.Set.SearchSet(_re2_options(case_sensitive=False))
+                for key in keys:
+                    regex_set.Add(patterns[key])
+                regex_set.Compile()
+                match = regex_set.Match
+                # Set.Match returns None (not []) when no pattern matches
+                return lambda line: match(line) or ()
+            except re2.error:
+                pass  # RE2 rejects e.g. lookarounds — use stdlib re instead
+
+        searches = [_compile(patterns[key].encode(), re.IGNORECASE).search for key in keys]
+        return lambda line: [idx for idx, search in enumerate(searches) if search(line)]
+
+    @staticmethod
+    def _hyperscan_database(keys: list[str], patterns: dict[str, str]) -> Any:
+        """Compile all patterns into one Hyperscan database, or None if any is unsupported."""
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[patterns[key].encode("utf-8") for key in keys],
+                ids=list(range(len(keys))),
+                elements=len(keys),
+                # MULTILINE keeps ^/$ anchored per line, matching search_content;
+                # SOM_LEFTMOST reports where each match starts, to spot line-crossers
+                flags=[
+                    hyperscan.HS_FLAG_CASELESS
+                    | hyperscan.HS_FLAG_MULTILINE
+                    | hyperscan.HS_FLAG_SOM_LEFTMOST
+                ] * len(keys),
+            )
+        except hyperscan.error:
+            return None
+        return db
+
+    @staticmethod
+    def _scan_hyperscan(
+        db: Any,
+        searches: list[Any],
+        keys: list[str],
+        path: str,
+        repo_file: RepoFile,
+        results: dict[str, list[tuple[str, int, str]]],
+    ) -> None:
+        """Scan one file's bytes with every pattern at once, recording one hit per line.
+
+        A match is credited to the line it ends on. If it started on an earlier line
+        (or ends past the line's terminator), that line is re-checked on its own.
+        """
+        content = repo_file.content
+        starts = repo_file.line_offsets
+        if not starts:
+            return
+        ends = repo_file.line_ends
+        decided: set[tuple[int, int]] = set()
+
+        def on_match(idx: int, start: int, end: int, flags: int, context: Any) -> None:
+            i = bisect.bisect_right(starts, end) - 1
+            if (idx, i) in decided:
+                return
+            decided.add((idx, i))
+            line_start, line_end = starts[i], ends[i]
+            within = line_start <= start and end <= line_end
+            if within or searches[idx](content[line_start:line_end]):
+                results[keys[idx]].append((path, i + 1, repo_file.line_text(i).strip()))
+
+        db.scan(content, match_event_handler=on_match)
+
 
 class RepoAnalyzer:
     """Fetches repository data from GitLab for compliance scanning."""
@@ -110,13 +675,93 @@ class RepoAnalyzer:
         "infrastructure/",
     ]
 
+    # All priority entries as a single matcher; see priority_of()
+    _PRIORITY_RE = _priority_regex(PRIORITY_FILES)
+
+    # Bitmask bit for each entry, as stored in RepoFile.priority
+    PRIORITY_BITS = {entry: 1 << i for i, entry in enumerate(PRIORITY_FILES)}
+
     # Max file size to fetch (50KB)
     MAX_FILE_SIZE = 50_000
 
-    def __init__(self, gl: gitlab.Gitlab, project_path: str) -> None:
+    # Bytes kept from files over MAX_FILE_SIZE
+    TRUNCATED_PREVIEW = 2000
+
+    # Concurrent file fetches; the connection pool is sized to keep them all alive
+    FETCH_WORKERS = 16
+    POOL_SIZE = 32
+
+    # GitLab caps repository tree pages at 100 entries
+    TREE_PAGE_SIZE = 100
+
+    # GitLab caps repository.blobs(paths:) at 100 paths per GraphQL request
+    BLOB_BATCH_SIZE = 100
+
+    BLOBS_QUERY = """
+    query($fullPath: ID!, $ref: String, $paths: [String!]!) {
+      project(fullPath: $fullPath) {
+        repository {
+          blobs(ref: $ref, paths: $paths) {
+            nodes { path rawBlob size }
+          }
+        }
+      }
+    }
+    """
+
+    MERGE_REQUESTS_QUERY = """
+    query($fullPath: ID!, $first: Int!) {
+      project(fullPath: $fullPath) {
+        mergeRequests(state: merged, sort: MERGED_AT_DESC, first: $first) {
+          nodes {
+            iid title mergedAt sourceBranch targetBranch
+            author { username }
+            approvedBy { nodes { username } }
+          }
+        }
+      }
+    }
+    """
+
+    # High-value compliance files
+    HIGH_VALUE_KEYWORDS = (
+        "security", "privacy", "compliance", "gdpr", "soc2", "audit",
+        "incident", "breach", "dpia", "ropa", "governance", "policy",
+        ".gitlab-ci", "ci.yml", "pipeline", "workflow",
+        "dockerfile", "docker-compose",
+        "changelog", "code_of_conduct", "contributing",
+        "renovate", "dependabot",
+    )
+
+    # Infrastructure and config
+    INFRA_KEYWORDS = ("infrastructure", "terraform", "ansible", "helm", "k8s", "kubernetes",
+                      "iam", "rbac", "access", "auth", "tls", "ssl", "cert")
+
+    # One automaton per category replaces a substring scan per keyword
+    _HIGH_VALUE_AUTOMATON = _build_automaton("high_value", HIGH_VALUE_KEYWORDS, 2.0)
+    _INFRA_AUTOMATON = _build_automaton("infra", INFRA_KEYWORDS, 1.5)
+
+    def __init__(
+        self, gl: gitlab.Gitlab, project_path: str, cache: ScanCache | None = None,
+    ) -> None:
         self.gl = gl
         self.project_path = project_path
+        self.cache = cache
         self._project: Project | None = None
+        self._configure_session()
+
+    def _configure_session(self) -> None:
+        """Widen the connection pool for parallel fetches, keeping any non-default adapter."""
+        session = getattr(self.gl, "session", None)
+        if session is None or not hasattr(session, "mount"):
+            return
+        adapter = None
+        for prefix in ("https://", "http://"):
+            if not _is_default_adapter(session.adapters.get(prefix)):
+                continue
+            if adapter is None:
+                adapter = HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE)
+            session.mount(prefix, adapter)
 
     @property
     def project(self) -> Project:
@@ -124,12 +769,26 @@ class RepoAnalyzer:
             self._project = self.gl.projects.get(self.project_path)
         return self._project
 
-    def analyze(self, max_files: int = 200) -> RepoSnapshot:
-        """Build a complete repo snapshot for compliance analysis."""
-        snapshot = RepoSnapshot(
-            project_path=self.project_path,
-            default_branch=self.project.default_branch or "main",
-        )
+    def analyze(self, max_files: int = 200, force: bool = False) -> RepoSnapshot:
+        """Build a complete repo snapshot for compliance analysis.
+
+        With a cache configured, files and CI config are reused when the default
+        branch head is unchanged since the last scan (unless ``force``). Settings,
+        branch rules and MRs are always refreshed — they change without commits.
+        """
+        default_branch = self.project.default_branch or "main"
+        cache = self.cache
+        head_sha = self._head_sha(default_branch) if cache else None
+
+        cached = None
+        if cache and head_sha and not force:
+            cached = cache.get_snapshot(self.project_path, head_sha, max_files)
+
+        if cached is not None:
+            snapshot = RepoSnapshot.from_json(cached)
+            snapshot.scanned_at = datetime.now(timezone.utc).isoformat()
+        else:
+            snapshot = RepoSnapshot(project_path=self.project_path, default_branch=default_branch)
 
         # Fetch project settings
         snapshot.project_settings = self._get_project_settings()
@@ -138,13 +797,26 @@ class RepoAnalyzer:
         snapshot.branch_rules = self._get_branch_rules(snapshot.default_branch)
 
         # Fetch repository files
-        self._fetch_files(snapshot, max_files)
+        complete = False
+        if cached is None:
+            complete = self._fetch_files(snapshot, max_files)
 
         # Fetch recent MRs
         snapshot.recent_mrs = self._get_recent_mrs(limit=50)
 
+        # A partial fetch is not cached, so the next scan retries instead of reusing it
+        if cache and head_sha and complete:
+            cache.put_snapshot(self.project_path, head_sha, max_files, snapshot.to_json())
+
         return snapshot
 
+    def _head_sha(self, branch: str) -> str | None:
+        """Return the default branch's head commit SHA, or None if unavailable."""
+        try:
+            return str(self.project.commits.get(branch).id)
+        except Exception:
+            return None
+
     def _get_project_settings(self) -> dict[str, Any]:
         """Extract relevant project settings."""
         p = self.project
@@ -173,94 +845,254 @@ class RepoAnalyzer:
         except Exception:
             return {"name": branch, "protected": False}
 
-    def _fetch_files(self, snapshot: RepoSnapshot, max_files: int) -> None:
-        """Fetch relevant files from the repository."""
+    def _fetch_files(self, snapshot: RepoSnapshot, max_files: int) -> bool:
+        """Fetch relevant files from the repository.
+
+        Returns False if the tree could not be listed or any selected file could not
+        be fetched, so the caller knows the snapshot is incomplete.
+        """
         try:
-            all_items = self.project.repository_tree(
-                recursive=True,
-                all=True,
-                per_page=500,
-            )
+            all_items = self._list_tree()
         except Exception:
-            return
+            return False
 
         # Score files by relevance
         scored: list[tuple[float, str]] = []
+        blob_shas: dict[str, str] = {}
         for item in all_items:
             if item["type"] != "blob":
                 continue
             path = item["path"]
+            blob_shas[path] = item["id"]
             score = self._relevance_score(path)
             if score > 0:
                 scored.append((score, path))
 
         scored.sort(reverse=True)
 
-        for _, path in scored[:max_files]:
-            content = self._fetch_file(path)
+        paths = [path for _, path in scored[:max_files]]
+        keys = [(path, blob_shas[path]) for path in paths]
+
+        # Unchanged blobs are served from the cache and never hit the network
+        cache = self.cache
+        cached: dict[str, bytes] = {}
+        if cache:
+            cached = cache.get_blobs(self.project_path, keys)
+        to_fetch = [path for path in paths if path not in cached]
+
+        batches = [
+            to_fetch[i:i + self.BLOB_BATCH_SIZE]
+            for i in range(0, len(to_fetch), self.BLOB_BATCH_SIZE)
+        ]
+        # Batches (and any per-file fallbacks) are independent round-trips — run them concurrently
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as pool:
+            fetched: dict[str, bytes] = {}
+            for batch in pool.map(self._fetch_blobs, batches):
+                fetched.update(batch)
+            missing = [path for path in to_fetch if path not in fetched]
+            for path, content in zip(missing, pool.map(self._fetch_file, missing)):
+                if content is not None:
+                    fetched[path] = content
+
+        if cache:
+            cache.put_blobs(
+                self.project_path,
+                [(path, blob_shas[path], content) for path, content in fetched.items()],
+            )
+            # Older versions and paths that left the tree are dead weight
+            cache.prune_blobs(self.project_path, blob_shas)
+        fetched.update(cached)
+
+        # Insert in score order, independent of which batch returned first
+        for path in paths:
+            content = fetched.get(path)
             if content is not None:
-                snapshot.files[path] = RepoFile(
-                    path=path,
-                    content=content,
-                    size=len(content),
-                )
+                snapshot.files[path] = RepoFile(path=path, content=content, size=len(content))
+        snapshot.index_paths()
+        return len(snapshot.files) == len(paths)
+
+    def _list_tree(self) -> list[dict[str, Any]]:
+        """List the full recursive repository tree, one entry per path.
+
+        When GitLab reports the page count, pages 2..N are fetched concurrently.
+        Very large trees omit the totals; those are walked again from the start
+        with keyset pagination, following Link: next.
+        """
+        path = f"/projects/{self.project.id}/repository/tree"
+        params: dict[str, Any] = {"recursive": True, "per_page": self.TREE_PAGE_SIZE}
+
+        first = self._get_raw(path, {**params, "page": 1})
+        items: list[dict[str, Any]] = first.json()
+        total_pages = first.headers.get("x-total-pages")
+        if len(items) < self.TREE_PAGE_SIZE or total_pages == "1":
+            return items
+
+        if total_pages:
+            def get_page(page: int) -> list[dict[str, Any]]:
+                page_items: list[dict[str, Any]] = self._get_raw(
+                    path, {**params, "page": page},
+                ).json()
+                return page_items
+
+            with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as pool:
+                for page_items in pool.map(get_page, range(2, int(total_pages) + 1)):
+                    items.extend(page_items)
+            return list({item["path"]: item for item in items}.values())
+
+        # No totals: keyset cursors are sequential by nature. The page token is a
+        # blob SHA, which empty or identical files share, so it can't be built from
+        # the offset page (a resume could restart at an earlier twin). Start over and
+        # let the server pick each token; entries a resume repeats are dropped by path.
+        by_path: dict[str, dict[str, Any]] = {}
+        response = self._get_raw(path, {**params, "pagination": "keyset"})
+        while True:
+            page_items = response.json()
+            seen = len(by_path)
+            for item in page_items:
+                by_path.setdefault(item["path"], item)
+            next_link = response.links.get("next")
+            if not next_link or len(page_items) < self.TREE_PAGE_SIZE:
+                return list(by_path.values())
+            if len(by_path) == seen:
+                raise gitlab.exceptions.GitlabError(f"Tree pagination of {path} stopped advancing")
+            response = self._get_raw(next_link["url"])
+
+    def _get_raw(self, path: str, query_data: dict[str, Any] | None = None) -> requests.Response:
+        """GET through python-gitlab, keeping the raw response for its headers and links."""
+        response = self.gl.http_get(path, query_data=query_data or {}, raw=True)
+        if not isinstance(response, requests.Response):
+            raise gitlab.exceptions.GitlabError(f"Expected a raw response from {path}")
+        return response
+
+    @classmethod
+    def priority_of(cls, path: str) -> int:
+        """Return the PRIORITY_FILES bitmask for a path (0 if it matches no entry)."""
+        match = cls._PRIORITY_RE.match(path)
+        if match is None or match.lastindex is None:
+            return 0
+        return 1 << (match.lastindex - 1)
 
     def _relevance_score(self, path: str) -> float:
         """Score a file path by compliance relevance (higher = more relevant)."""
-        path_lower = path.lower()
+        return self._score_path(path.lower())
 
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _score_path(path_lower: str) -> float:
         # Skip binary/build artifacts
-        skip_extensions = [".png", ".jpg", ".gif", ".ico", ".woff", ".ttf", ".eot", ".svg",
-                           ".min.js", ".min.css", ".lock", ".sum", ".mod"]
-        if any(path_lower.endswith(ext) for ext in skip_extensions):
+        if path_lower.endswith(_SKIP_EXT):
             return 0.0
 
         score = 0.1  # Base score for any text file
 
         # High-value compliance files
-        high_value = [
-            "security", "privacy", "compliance", "gdpr", "soc2", "audit",
-            "incident", "breach", "dpia", "ropa", "governance", "policy",
-            ".gitlab-ci", "ci.yml", "pipeline", "workflow",
-            "dockerfile", "docker-compose",
-            "changelog", "code_of_conduct", "contributing",
-            "renovate", "dependabot",
-        ]
-        for keyword in high_value:
-            if keyword in path_lower:
-                score += 2.0
-                break
+        score += _keyword_weight(path_lower, RepoAnalyzer._HIGH_VALUE_AUTOMATON,
+                                 RepoAnalyzer.HIGH_VALUE_KEYWORDS, 2.0)
 
         # Infrastructure and config
-        infra_keywords = ["infrastructure", "terraform", "ansible", "helm", "k8s", "kubernetes",
-                          "iam", "rbac", "access", "auth", "tls", "ssl", "cert"]
-        for keyword in infra_keywords:
-            if keyword in path_lower:
-                score += 1.5
-                break
+        score += _keyword_weight(path_lower, RepoAnalyzer._INFRA_AUTOMATON,
+                                 RepoAnalyzer.INFRA_KEYWORDS, 1.5)
 
         # Documentation
         if path_lower.startswith("docs/") or path_lower.endswith(".md"):
             score += 0.5
 
         # Root-level files are important
-        if "/" not in path:
+        if "/" not in path_lower:
             score += 1.0
 
         return score
 
-    def _fetch_file(self, path: str) -> str | None:
-        """Fetch a single file's content."""
+    def _graphql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        """Run a GitLab GraphQL query through the shared session and return its data."""
+        response = self.gl.http_post(
+            f"{self.gl.url.rstrip('/')}/api/graphql",
+            post_data={"query": query, "variables": variables},
+        )
+        data = response.get("data") if isinstance(response, dict) else None
+        if not isinstance(data, dict):
+            # GraphQL reports failures as a body with "errors" and no data
+            errors = response.get("errors") if isinstance(response, dict) else response
+            raise gitlab.exceptions.GitlabError(f"GraphQL query failed: {errors}")
+        return data
+
+    def _fetch_blobs(self, paths: list[str]) -> dict[str, bytes]:
+        """Fetch up to BLOB_BATCH_SIZE files' raw content in one GraphQL request.
+
+        Returns {path: content}; paths missing from the result are left to _fetch_file.
+        """
+        try:
+            data = self._graphql(self.BLOBS_QUERY, {
+                "fullPath": self.project.path_with_namespace,
+                "ref": self.project.default_branch,
+                "paths": paths,
+            })
+            nodes = data["project"]["repository"]["blobs"]["nodes"]
+        except Exception:
+            return {}
+
+        contents: dict[str, bytes] = {}
+        for node in nodes:
+            if node.get("rawBlob") is None:
+                continue
+            raw = node["rawBlob"].encode("utf-8")
+            size = int(node.get("size") or len(raw))
+            if size > self.MAX_FILE_SIZE:
+                notice = f"[File too large: {size} bytes - truncated]\n".encode()
+                raw = notice + raw[:self.TRUNCATED_PREVIEW]
+            contents[node["path"]] = raw
+        return contents
+
+    def _fetch_file(self, path: str) -> bytes | None:
+        """Fetch a single file's content (REST fallback for paths GraphQL did not return)."""
         try:
             f = self.project.files.get(file_path=path, ref=self.project.default_branch)
             if f.size > self.MAX_FILE_SIZE:
-                return f"[File too large: {f.size} bytes — truncated]\n" + base64.b64decode(f.content).decode("utf-8", errors="replace")[:2000]
-            return base64.b64decode(f.content).decode("utf-8", errors="replace")
+                # 4 base64 chars decode to 3 bytes: decode only enough for the preview
+                head = f.content[:(self.TRUNCATED_PREVIEW // 3 + 1) * 4]
+                preview = binascii.a2b_base64(head)[:self.TRUNCATED_PREVIEW]
+                return f"[File too large: {f.size} bytes - truncated]\n".encode() + preview
+            return binascii.a2b_base64(f.content)
         except Exception:
             return None
 
     def _get_recent_mrs(self, limit: int = 50) -> list[MergeRequestInfo]:
-        """Fetch recent merged MRs with approval data."""
+        """Fetch recent merged MRs with approval data.
+
+        Uses one GraphQL request for MRs and approvers; falls back to the REST list
+        plus one approvals call per MR when GraphQL is unavailable.
+        """
+        mrs = self._get_recent_mrs_graphql(limit)
+        if mrs is not None:
+            return mrs
+        return self._get_recent_mrs_rest(limit)
+
+    def _get_recent_mrs_graphql(self, limit: int) -> list[MergeRequestInfo] | None:
+        try:
+            data = self._graphql(self.MERGE_REQUESTS_QUERY, {
+                "fullPath": self.project.path_with_namespace,
+                "first": limit,
+            })
+            nodes = data["project"]["mergeRequests"]["nodes"]
+            mrs = []
+            for node in nodes:
+                approved_by = [u["username"] for u in node["approvedBy"]["nodes"]]
+                mrs.append(MergeRequestInfo(
+                    iid=int(node["iid"]),
+                    title=node["title"],
+                    author=node["author"]["username"],
+                    approvers=approved_by,
+                    approver_count=len(approved_by),
+                    merged_at=node["mergedAt"],
+                    has_ci_passed=True,  # If merged, CI likely passed
+                    source_branch=node["sourceBranch"],
+                    target_branch=node["targetBranch"],
+                ))
+            return mrs
+        except Exception:
+            return None
+
+    def _get_recent_mrs_rest(self, limit: int) -> list[MergeRequestInfo]:
         mrs = []
         try:
             recent = self.project.mergerequests.list(
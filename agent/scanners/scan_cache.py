@@ -0,0 +1,115 @@
+"""SQLite-backed cache so repeat scans of an unchanged repo skip GitLab fetches."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_DB_PATH = os.getenv("SCAN_CACHE_PATH", ".compliance_scan_cache.db")
+
+# Bump when the schema or the snapshot JSON changes; older cache files are dropped and rebuilt
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_cache (
+    project_path  TEXT NOT NULL,
+    head_sha      TEXT NOT NULL,
+    max_files     INTEGER NOT NULL,
+    snapshot_json TEXT NOT NULL,
+    scanned_at    TEXT NOT NULL,
+    PRIMARY KEY (project_path, max_files)
+);
+CREATE TABLE IF NOT EXISTS blob_cache (
+    project_path TEXT NOT NULL,
+    path         TEXT NOT NULL,
+    blob_sha     TEXT NOT NULL,
+    content      BLOB NOT NULL,
+    PRIMARY KEY (project_path, path, blob_sha)
+);
+"""
+
+
+class ScanCache:
+    """Persists the last snapshot per (project, max_files), keyed on the head commit SHA,
+    and file contents per (path, blob SHA), so unchanged files are never re-fetched."""
+
+    def __init__(self, db_path: str | os.PathLike[str] = DEFAULT_DB_PATH) -> None:
+        # Shared across fetch threads; writes are serialized by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS scan_cache; DROP TABLE IF EXISTS blob_cache;"
+                )
+                self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            self._conn.executescript(_SCHEMA)
+
+    def get_snapshot(self, project_path: str, head_sha: str, max_files: int) -> str | None:
+        """Return the cached snapshot JSON if it was taken at head_sha with max_files."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot_json FROM scan_cache"
+                " WHERE project_path = ? AND head_sha = ? AND max_files = ?",
+                (project_path, head_sha, max_files),
+            ).fetchone()
+        return str(row[0]) if row else None
+
+    def put_snapshot(
+        self, project_path: str, head_sha: str, max_files: int, snapshot_json: str,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scan_cache VALUES (?, ?, ?, ?, ?)",
+                (
+                    project_path, head_sha, max_files, snapshot_json,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def get_blobs(self, project_path: str, keys: list[tuple[str, str]]) -> dict[str, bytes]:
+        """Look up cached contents for (path, blob_sha) pairs; returns {path: content}."""
+        found: dict[str, bytes] = {}
+        with self._lock:
+            for path, blob_sha in keys:
+                row = self._conn.execute(
+                    "SELECT content FROM blob_cache"
+                    " WHERE project_path = ? AND path = ? AND blob_sha = ?",
+                    (project_path, path, blob_sha),
+                ).fetchone()
+                if row:
+                    found[path] = bytes(row[0])
+        return found
+
+    def put_blobs(self, project_path: str, entries: list[tuple[str, str, bytes]]) -> None:
+        """Store (path, blob_sha, content) entries."""
+        if not entries:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blob_cache VALUES (?, ?, ?, ?)",
+                [(project_path, path, sha, content) for path, sha, content in entries],
+            )
+
+    def prune_blobs(self, project_path: str, tree: dict[str, str]) -> None:
+        """Drop the project's cached blobs that are not in the current tree ({path: blob_sha}).
+
+        Removes old versions and deleted or renamed paths, but keeps every current
+        blob, so scans with different max_files selections share the cache.
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path, blob_sha FROM blob_cache WHERE project_path = ?",
+                (project_path,),
+            ).fetchall()
+            stale = [(project_path, path, sha) for path, sha in rows if tree.get(path) != sha]
+            self._conn.executemany(
+                "DELETE FROM blob_cache WHERE project_path = ? AND path = ? AND blob_sha = ?",
+                stale,
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -5,23 +5,30 @@ GitLab Duo Agent Hackathon submission
 
 from __future__ import annotations
 
+import asyncio
 import json
+import multiprocessing
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 
 from app.scanner import ComplianceScanner
 from app.models import ScanRequest, ScanResult, ControlStatus
+from app.store import create_scan_store
 
 app = FastAPI(
     title="Compliance Autopilot",
     description="GitLab Duo Agent for SOC2/GDPR compliance drift detection",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -32,8 +39,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory scan store (use Redis/DB in production)
-_scans: dict[str, dict[str, Any]] = {}
+# Bounded in-memory scan store; set REDIS_URL to share scans across workers
+store = create_scan_store()
+
+# Scans are CPU-bound (regex passes, scoring); run them off the event loop
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _new_process_pool() -> ProcessPoolExecutor:
+    """Start a scan pool; forkserver, since forking the threaded server can deadlock."""
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("forkserver"),
+    )
+
+
+@app.on_event("startup")
+async def _start_process_pool():
+    global _process_pool
+    _process_pool = _new_process_pool()
+
+
+def _replace_broken_pool(broken: ProcessPoolExecutor | None) -> None:
+    """Swap in a fresh pool after a worker died, unless another scan already did."""
+    global _process_pool
+    if broken is None or _process_pool is not broken:
+        return
+    broken.shutdown(wait=False, cancel_futures=True)
+    _process_pool = _new_process_pool()
+
+
+@app.on_event("shutdown")
+async def _stop_process_pool():
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
 
 
 @app.get("/health")
@@ -79,53 +117,81 @@ async def list_frameworks():
 async def start_scan(req: ScanRequest, background_tasks: BackgroundTasks):
     """Start a compliance scan for a GitLab project."""
     scan_id = str(uuid.uuid4())[:8]
-    _scans[scan_id] = {
+    await store.put(scan_id, {
         "scan_id": scan_id,
         "status": "running",
         "project_path": req.project_path,
         "frameworks": req.frameworks,
         "started_at": datetime.now(timezone.utc).isoformat(),
         "result": None,
-    }
+    })
 
     background_tasks.add_task(_run_scan, scan_id, req)
     return {"scan_id": scan_id, "status": "running", "message": f"Scan started for {req.project_path}"}
 
 
+def _scan_in_worker(
+    scanner_kwargs: dict[str, Any], project_path: str, frameworks: list[str],
+) -> dict[str, Any]:
+    """Run one scan inside a pool process.
+
+    The scanner is built in the worker, and the result is returned as a plain dict
+    so only JSON-shaped data is pickled back to the server process.
+    """
+    scanner = ComplianceScanner(**scanner_kwargs)
+    result = asyncio.run(scanner.scan(project_path=project_path, frameworks=frameworks))
+    return result.model_dump(mode="json")
+
+
 async def _run_scan(scan_id: str, req: ScanRequest):
-    """Background task: run the full compliance scan."""
+    """Background task: run the full compliance scan in the process pool."""
     try:
-        scanner = ComplianceScanner(
-            gitlab_url=req.gitlab_url or os.getenv("GITLAB_URL", "https://gitlab.com"),
-            gitlab_token=req.gitlab_token or os.getenv("GITLAB_TOKEN", ""),
-            anthropic_key=os.getenv("ANTHROPIC_API_KEY", ""),
-            use_mock=os.getenv("USE_MOCK", "true").lower() == "true",
+        scanner_kwargs = {
+            "gitlab_url": req.gitlab_url or os.getenv("GITLAB_URL", "https://gitlab.com"),
+            "gitlab_token": req.gitlab_token or os.getenv("GITLAB_TOKEN", ""),
+            "anthropic_key": os.getenv("ANTHROPIC_API_KEY", ""),
+            "use_mock": os.getenv("USE_MOCK", "true").lower() == "true",
+        }
+        pool = _process_pool
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                pool, _scan_in_worker, scanner_kwargs, req.project_path, req.frameworks,
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed) and took the pool with it: this scan
+            # fails, but later scans get a fresh pool instead of failing too
+            _replace_broken_pool(pool)
+            raise
+        await store.update(
+            scan_id,
+            status="completed",
+            result=result,
+            completed_at=datetime.now(timezone.utc).isoformat(),
         )
-        result = await scanner.scan(
-            project_path=req.project_path,
-            frameworks=req.frameworks,
-        )
-        _scans[scan_id]["status"] = "completed"
-        _scans[scan_id]["result"] = result
-        _scans[scan_id]["completed_at"] = datetime.now(timezone.utc).isoformat()
     except Exception as e:
-        _scans[scan_id]["status"] = "failed"
-        _scans[scan_id]["error"] = str(e)
-        _scans[scan_id]["completed_at"] = datetime.now(timezone.utc).isoformat()
+        await store.update(
+            scan_id,
+            status="failed",
+            error=str(e),
+            completed_at=datetime.now(timezone.utc).isoformat(),
+        )
 
 
 @app.get("/scans/{scan_id}")
 async def get_scan(scan_id: str):
     """Get scan result by ID."""
-    if scan_id not in _scans:
+    scan = await store.get_json(scan_id)
+    if scan is None:
         raise HTTPException(status_code=404, detail=f"Scan {scan_id} not found")
-    return _scans[scan_id]
+    # Already serialized at write time — skip FastAPI's jsonable_encoder pass
+    return Response(content=scan, media_type="application/json")
 
 
 @app.get("/scans")
 async def list_scans():
     """List all scans."""
-    return {"scans": list(_scans.values())}
+    scans = await store.list_json()
+    return Response(content=b'{"scans":[' + b",".join(scans) + b"]}", media_type="application/json")
 
 
 @app.post("/demo-scan")
@@ -0,0 +1,138 @@
+"""Scan result storage — bounded in-memory by default, Redis when REDIS_URL is set."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+
+import orjson
+from cachetools import TTLCache
+from pydantic_core import to_jsonable_python
+
+SCAN_TTL_SECONDS = int(os.getenv("SCAN_TTL_SECONDS", "3600"))
+SCAN_STORE_MAXSIZE = int(os.getenv("SCAN_STORE_MAXSIZE", "1024"))
+
+
+def _pack(data: dict[str, Any]) -> bytes:
+    # Serialized once with orjson (Pydantic models via the default hook);
+    # findings lists are repetitive JSON and compress well
+    return zlib.compress(orjson.dumps(data, default=to_jsonable_python))
+
+
+def _unpack(blob: bytes) -> dict[str, Any]:
+    data: dict[str, Any] = orjson.loads(zlib.decompress(blob))
+    return data
+
+
+class ScanStore(ABC):
+    """Async key-value store for scan records, keyed by scan ID."""
+
+    @abstractmethod
+    async def _get_blob(self, scan_id: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def _blobs(self) -> list[bytes]: ...
+
+    @abstractmethod
+    async def put(self, scan_id: str, data: dict[str, Any]) -> None: ...
+
+    async def get(self, scan_id: str) -> dict[str, Any] | None:
+        blob = await self._get_blob(scan_id)
+        return _unpack(blob) if blob is not None else None
+
+    async def get_json(self, scan_id: str) -> bytes | None:
+        """Return the stored record as JSON bytes, ready to send without re-encoding."""
+        blob = await self._get_blob(scan_id)
+        return zlib.decompress(blob) if blob is not None else None
+
+    async def list_all(self) -> list[dict[str, Any]]:
+        return [_unpack(blob) for blob in await self._blobs()]
+
+    async def list_json(self) -> list[bytes]:
+        """Return every stored record as JSON bytes."""
+        return [zlib.decompress(blob) for blob in await self._blobs()]
+
+    async def update(self, scan_id: str, **changes: Any) -> None:
+        """Merge fields into a record.
+
+        If the record was evicted or expired meanwhile (a long scan can outlive its
+        "running" entry), the changes are stored as a fresh record so a finished
+        result is never dropped.
+        """
+        data = await self.get(scan_id) or {"scan_id": scan_id}
+        data.update(changes)
+        await self.put(scan_id, data)
+
+
+class MemoryScanStore(ScanStore):
+    """LRU + TTL bounded store so finished scans cannot grow memory without limit."""
+
+    def __init__(
+        self,
+        maxsize: int = SCAN_STORE_MAXSIZE,
+        ttl: int = SCAN_TTL_SECONDS,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache: TTLCache[str, bytes] = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = asyncio.Lock()
+
+    async def _get_blob(self, scan_id: str) -> bytes | None:
+        async with self._lock:
+            return self._cache.get(scan_id)
+
+    async def put(self, scan_id: str, data: dict[str, Any]) -> None:
+        blob = _pack(data)
+        async with self._lock:
+            self._cache[scan_id] = blob
+
+    async def update(self, scan_id: str, **changes: Any) -> None:
+        # Hold the lock across read-modify-write so concurrent updates don't interleave
+        async with self._lock:
+            blob = self._cache.get(scan_id)
+            data = _unpack(blob) if blob is not None else {"scan_id": scan_id}
+            data.update(changes)
+            self._cache[scan_id] = _pack(data)
+
+    async def _blobs(self) -> list[bytes]:
+        async with self._lock:
+            return list(self._cache.values())
+
+
+class RedisScanStore(ScanStore):
+    """Redis-backed store shared across workers; records expire after the TTL."""
+
+    KEY_PREFIX = "scan:"
+
+    def __init__(self, url: str, ttl: int = SCAN_TTL_SECONDS) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._ttl = ttl
+
+    async def _get_blob(self, scan_id: str) -> bytes | None:
+        blob: bytes | None = await self._redis.get(self.KEY_PREFIX + scan_id)
+        return blob
+
+    async def put(self, scan_id: str, data: dict[str, Any]) -> None:
+        await self._redis.set(self.KEY_PREFIX + scan_id, _pack(data), ex=self._ttl)
+
+    async def _blobs(self) -> list[bytes]:
+        blobs = []
+        async for key in self._redis.scan_iter(match=self.KEY_PREFIX + "*"):
+            blob = await self._redis.get(key)
+            if blob is not None:
+                blobs.append(blob)
+        return blobs
+
+
+def create_scan_store() -> ScanStore:
+    """Pick the store from the environment: Redis if REDIS_URL is set, else in-memory."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisScanStore(redis_url)
+    return MemoryScanStore()
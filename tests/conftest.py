@@ -0,0 +1,29 @@
+"""Shared fixtures for the scanner tests."""
+
+from __future__ import annotations
+
+import importlib.util
+from collections.abc import Iterator
+
+import pytest
+
+from agent.scanners import repo_analyzer
+
+ENGINES = ["hyperscan", "re2", "stdlib"]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    """Run a test once per regex engine, hiding the optional modules it shouldn't use."""
+    name = request.param
+    if name != "stdlib" and importlib.util.find_spec(name) is None:
+        pytest.skip(f"{name} not installed")
+    if name != "hyperscan":
+        monkeypatch.setattr(repo_analyzer, "hyperscan", None)
+    if name == "stdlib":
+        monkeypatch.setattr(repo_analyzer, "re2", None)
+    # Compiled patterns are cached per engine choice
+    repo_analyzer._compile.cache_clear()
+    yield name
+    repo_analyzer._compile.cache_clear()
+
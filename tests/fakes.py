@@ -0,0 +1,160 @@
+"""A minimal in-memory GitLab for exercising RepoAnalyzer without the network."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import gitlab
+import requests
+
+
+def _response(
+    items: list[dict[str, Any]], headers: dict[str, str] | None = None,
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(items).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeProject:
+    """The slice of a python-gitlab Project that RepoAnalyzer reads."""
+
+    id = 1
+    path_with_namespace = "group/project"
+    default_branch = "main"
+    visibility = "private"
+    merge_method = "merge"
+    only_allow_merge_if_pipeline_succeeds = True
+    only_allow_merge_if_all_discussions_are_resolved = False
+
+    def __init__(self, gl: FakeGitlab) -> None:
+        self.commits = SimpleNamespace(get=lambda branch: SimpleNamespace(id=gl.head_sha))
+        self.protectedbranches = SimpleNamespace(get=self._missing)
+        self.files = SimpleNamespace(get=self._missing)
+        self._gl = gl
+        self.mergerequests = SimpleNamespace(list=self._list_merge_requests)
+
+    def _list_merge_requests(self, **kwargs: Any) -> list[SimpleNamespace]:
+        self._gl.rest_calls += 1
+        return [
+            SimpleNamespace(
+                iid=mr["iid"],
+                title=mr["title"],
+                author={"username": mr["author"]},
+                merged_at=mr["merged_at"],
+                source_branch=mr["source_branch"],
+                target_branch=mr["target_branch"],
+                approvals=SimpleNamespace(get=lambda mr=mr: self._approvals(mr)),
+            )
+            for mr in self._gl.merge_requests
+        ]
+
+    def _approvals(self, mr: dict[str, Any]) -> SimpleNamespace:
+        self._gl.rest_calls += 1
+        return SimpleNamespace(approved_by=[{"user": {"username": u}} for u in mr["approvers"]])
+
+    @staticmethod
+    def _missing(*args: Any, **kwargs: Any) -> Any:
+        raise gitlab.exceptions.GitlabGetError("404 Not Found", 404)
+
+
+class FakeGitlab:
+    """In-memory GitLab serving a repository tree, GraphQL blob contents and merged MRs.
+
+    ``pagination`` picks how the tree is paged: "offset" sends x-total-pages,
+    "keyset" omits the totals and links pages with Link: next. ``mr_graphql`` picks
+    how the merge request query is answered: "ok", "errors" (a body with only
+    "errors") or "unavailable" (an HTTP error).
+    """
+
+    url = "https://gitlab.example.com"
+
+    def __init__(
+        self, files: dict[str, bytes], head_sha: str = "abc123", pagination: str = "offset",
+    ) -> None:
+        self.files = files
+        self.head_sha = head_sha
+        self.pagination = pagination
+        self.merge_requests: list[dict[str, Any]] = []
+        self.mr_graphql = "ok"
+        self.graphql_posts = 0
+        self.rest_calls = 0
+        self.fail_tree = False
+        self.tree_requests = 0
+        self.blob_requests: list[list[str]] = []
+        self.projects = SimpleNamespace(get=lambda path: FakeProject(self))
+
+    def _tree(self) -> list[dict[str, Any]]:
+        return [
+            {"id": hashlib.sha1(content).hexdigest(), "path": path, "type": "blob"}
+            for path, content in sorted(self.files.items())
+        ]
+
+    def http_get(
+        self, path: str, query_data: dict[str, Any] | None = None, raw: bool = False,
+    ) -> Any:
+        self.tree_requests += 1
+        if self.fail_tree:
+            raise gitlab.exceptions.GitlabHttpError("500 Internal Server Error", 500)
+        tree = self._tree()
+        query = dict(query_data or {})
+        if "?page_token=" in path:
+            query.update(pagination="keyset", page_token=path.rsplit("=", 1)[1])
+        per_page = int(query.get("per_page", 100))
+
+        if query.get("pagination") == "keyset":
+            # Like Gitaly: resume after the entry whose ID is the page token
+            ids = [item["id"] for item in tree]
+            start = ids.index(query["page_token"]) + 1 if "page_token" in query else 0
+            page = tree[start:start + per_page]
+            headers = {}
+            if start + per_page < len(tree):
+                token = page[-1]["id"]
+                headers["Link"] = f'<{self.url}/tree?page_token={token}>; rel="next"'
+            return _response(page, headers)
+
+        page_no = int(query.get("page", 1))
+        page = tree[(page_no - 1) * per_page:page_no * per_page]
+        if not raw:
+            return page
+        headers = {}
+        if self.pagination == "offset":
+            headers["x-total-pages"] = str(-(-len(tree) // per_page))
+        return _response(page, headers)
+
+    def http_post(self, path: str, post_data: dict[str, Any]) -> dict[str, Any]:
+        variables = post_data["variables"]
+        if "paths" not in variables:
+            return self._merge_requests_query(variables)
+        self.blob_requests.append(list(variables["paths"]))
+        nodes = [
+            {"path": path, "rawBlob": self.files[path].decode(), "size": len(self.files[path])}
+            for path in variables["paths"]
+            if path in self.files
+        ]
+        return {"data": {"project": {"repository": {"blobs": {"nodes": nodes}}}}}
+
+    def _merge_requests_query(self, variables: dict[str, Any]) -> dict[str, Any]:
+        self.graphql_posts += 1
+        if self.mr_graphql == "unavailable":
+            raise gitlab.exceptions.GitlabHttpError("404 Not Found", 404)
+        if self.mr_graphql == "errors":
+            return {"errors": [{"message": "Field 'approvedBy' doesn't exist"}]}
+        nodes = [
+            {
+                "iid": str(mr["iid"]),  # GraphQL serializes iid as a string
+                "title": mr["title"],
+                "mergedAt": mr["merged_at"],
+                "sourceBranch": mr["source_branch"],
+                "targetBranch": mr["target_branch"],
+                "author": {"username": mr["author"]},
+                "approvedBy": {"nodes": [{"username": u} for u in mr["approvers"]]},
+            }
+            for mr in self.merge_requests[:variables["first"]]
+        ]
+        return {"data": {"project": {"mergeRequests": {"nodes": nodes}}}}
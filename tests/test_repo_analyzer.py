@@ -0,0 +1,343 @@
+"""Tests for RepoSnapshot search and path lookups."""
+
+from __future__ import annotations
+
+import re
+
+import gitlab
+import pytest
+from requests.adapters import HTTPAdapter
+
+from agent.scanners import repo_analyzer
+from agent.scanners.repo_analyzer import MergeRequestInfo, RepoAnalyzer, RepoFile, RepoSnapshot
+from tests.fakes import FakeGitlab
+
+
+def _snapshot(files: dict[str, str]) -> RepoSnapshot:
+    return RepoSnapshot(
+        project_path="group/project",
+        default_branch="main",
+        files={path: RepoFile(path=path, content=text.encode()) for path, text in files.items()},
+    )
+
+
+def test_search_many_reports_hits_per_pattern(engine: str) -> None:
+    snapshot = _snapshot({
+        "app.py": "import os\nPASSWORD = os.environ['PW']\n",
+        "README.md": "Enable MFA for all users\n",
+    })
+    results = snapshot.search_many({"pw": "password", "mfa": r"\bmfa\b", "none": "zzz"})
+    assert results == {
+        "pw": [("app.py", 2, "PASSWORD = os.environ['PW']")],
+        "mfa": [("README.md", 1, "Enable MFA for all users")],
+        "none": [],
+    }
+
+
+def test_search_many_handles_files_without_matches(engine: str) -> None:
+    snapshot = _snapshot({"a.txt": "nothing here\nor here\n"})
+    assert snapshot.search_many({"a": "password", "b": "zzz"}) == {"a": [], "b": []}
+
+
+def test_relevance_score_same_with_and_without_automata(monkeypatch: pytest.MonkeyPatch) -> None:
+    paths = ["SECURITY.md", "docs/terraform/auth.md", "logo.png", "src/main.py", "k8s/x.yaml"]
+    with_automata = [RepoAnalyzer._score_path.__wrapped__(p.lower()) for p in paths]
+    monkeypatch.setattr(RepoAnalyzer, "_HIGH_VALUE_AUTOMATON", None)
+    monkeypatch.setattr(RepoAnalyzer, "_INFRA_AUTOMATON", None)
+    without = [RepoAnalyzer._score_path.__wrapped__(p.lower()) for p in paths]
+    assert with_automata == without == [3.6, 2.1, 0.0, 0.1, 1.6]
+
+
+# Contents chosen so a whole-file search could wrongly join or split lines
+LINE_EDGE_FILES = {
+    "split.py": "password\n= 'abc'\nx\nxz\n",
+    "crlf.env": "api_secret\r\nsecret = 1\r\n\r\n",
+    "cr.txt": "old mac\rsecret\r",
+    "blank.md": "a\n\nb\n",
+    "no_newline.cfg": "first\nsecret",
+    "empty.txt": "",
+    "newline.txt": "\n",
+    # Breaks that str.splitlines() honours and bytes.splitlines() doesn't
+    "controls.txt": "x\fpassword = 1\vsecret\x1csecret = 2\x1d\x1e",
+}
+
+LINE_EDGE_PATTERNS = [
+    r"password\s*=",
+    r"=\s*'",
+    r"secret$",
+    r"^secret",
+    r"^$",
+    r"x[^y]*z",
+    r"[^a]+",
+    r"\n",
+    r"(?<=\n)b",
+    r"\Asecret",
+]
+
+
+def _baseline_search(files: dict[str, str], pattern: str) -> list[tuple[str, int, str]]:
+    """The original per-line search_content, as the reference for the fast paths."""
+    regex = re.compile(pattern, re.IGNORECASE)
+    return [
+        (path, i, line.strip())
+        for path, text in files.items()
+        for i, line in enumerate(text.splitlines(), start=1)
+        if regex.search(line)
+    ]
+
+
+@pytest.mark.parametrize("pattern", LINE_EDGE_PATTERNS)
+def test_search_content_matches_per_line_baseline(engine: str, pattern: str) -> None:
+    snapshot = _snapshot(LINE_EDGE_FILES)
+    assert snapshot.search_content(pattern) == _baseline_search(LINE_EDGE_FILES, pattern)
+
+
+@pytest.mark.parametrize("pattern", LINE_EDGE_PATTERNS)
+def test_search_many_matches_per_line_baseline(engine: str, pattern: str) -> None:
+    snapshot = _snapshot(LINE_EDGE_FILES)
+    assert snapshot.search_many({"p": pattern}) == {
+        "p": _baseline_search(LINE_EDGE_FILES, pattern),
+    }
+
+
+def test_search_many_batch_matches_per_line_baseline(engine: str) -> None:
+    # Non-empty patterns only, so Hyperscan compiles them into one database
+    patterns = {str(i): p for i, p in enumerate(LINE_EDGE_PATTERNS[:4] + [r"x[^y]*z"])}
+    results = _snapshot(LINE_EDGE_FILES).search_many(patterns)
+    assert results == {key: _baseline_search(LINE_EDGE_FILES, p) for key, p in patterns.items()}
+
+
+def test_lines_split_like_str_splitlines(engine: str) -> None:
+    snapshot = _snapshot({"a.txt": "x\fpassword = 1\n", "b.txt": "café\u2028password = 2"})
+    assert snapshot.search_content(r"^password") == [
+        ("a.txt", 2, "password = 1"),
+        ("b.txt", 2, "password = 2"),
+    ]
+    assert snapshot.search_many({"p": r"^password"})["p"] == [
+        ("a.txt", 2, "password = 1"),
+        ("b.txt", 2, "password = 2"),
+    ]
+
+
+@pytest.mark.parametrize(("content", "lf_only"), [
+    (b"a\nb\n", True),
+    (b"", True),
+    (b"a\r\nb", False),
+    (b"a\fb\n", False),
+    (b"a\x1eb", False),
+])
+def test_lf_only_is_computed_with_the_line_index(content: bytes, lf_only: bool) -> None:
+    repo_file = RepoFile(path="a.txt", content=content)
+    assert repo_file.lf_only is lf_only
+    assert repo_file.line_offsets is repo_file.line_offsets
+
+
+def test_byte_searches_decode_only_matched_lines(engine: str) -> None:
+    snapshot = _snapshot({"a.py": "x = 1\npassword = 2\n", "b.py": "y = 3\n"})
+    assert snapshot.search_content("password") == [("a.py", 2, "password = 2")]
+    assert snapshot.search_many({"p": "password", "q": "y ="})["q"] == [("b.py", 1, "y = 3")]
+    assert all(f._lines is None for f in snapshot.files.values())
+
+
+def test_search_content_file_extensions() -> None:
+    paths = ["ci.YML", "app.min.js", "app.js", "ops/Dockerfile", ".env", "prod.env", "a.md"]
+    snapshot = _snapshot({path: "secret\n" for path in paths})
+    found = snapshot.search_content("secret", [".yml", ".min.js", "Dockerfile", ".env"])
+    # Single-dot suffixes ignore case and a bare dotfile is its own suffix;
+    # ".min.js" and "Dockerfile" are plain suffix checks
+    assert [path for path, _, _ in found] == [
+        "ci.YML", "app.min.js", "ops/Dockerfile", ".env", "prod.env",
+    ]
+
+
+def test_path_indexes_follow_file_mutations() -> None:
+    snapshot = _snapshot({"docs/a.md": "a", "src/Dockerfile": "FROM scratch"})
+    snapshot.index_paths()
+    assert snapshot.has_file("docs/")
+
+    # Same size before and after: a length check alone would miss this
+    del snapshot.files["docs/a.md"]
+    snapshot.files["ops/Dockerfile"] = RepoFile(path="ops/Dockerfile", content=b"FROM scratch")
+    assert not snapshot.has_file("docs/")
+    assert snapshot.has_file("ops/")
+    assert snapshot.files_named("Dockerfile") == ["src/Dockerfile", "ops/Dockerfile"]
+
+    snapshot.files |= {"docs/b.md": RepoFile(path="docs/b.md", content=b"b")}
+    assert snapshot.has_file("docs/*")
+
+    snapshot.files = {"README.md": RepoFile(path="README.md", content=b"hi")}
+    assert snapshot.files_named("Dockerfile") == []
+
+
+@pytest.mark.parametrize(("pagination", "count", "requests"), [
+    ("offset", 5, 1),
+    ("offset", 100, 1),
+    ("offset", 200, 2),
+    ("offset", 250, 3),
+    ("keyset", 5, 1),
+    # A full first page without totals restarts the walk with keyset pagination
+    ("keyset", 100, 2),
+    ("keyset", 200, 3),
+    ("keyset", 250, 4),
+])
+def test_list_tree_collects_every_page(pagination: str, count: int, requests: int) -> None:
+    files = {f"src/file{i:03}.py": str(i).encode() for i in range(count)}
+    gl = FakeGitlab(files, pagination=pagination)
+    items = RepoAnalyzer(gl, "group/project")._list_tree()
+
+    assert [item["path"] for item in items] == sorted(gl.files)
+    assert gl.tree_requests == requests
+
+
+def test_list_tree_keyset_survives_duplicate_blob_at_page_boundary() -> None:
+    files = {f"src/file{i:03}.py": str(i).encode() for i in range(151)}
+    # Last entry of the first page shares its blob SHA with an earlier entry
+    files["src/file099.py"] = files["src/file005.py"]
+    gl = FakeGitlab(files, pagination="keyset")
+    items = RepoAnalyzer(gl, "group/project")._list_tree()
+
+    assert [item["path"] for item in items] == sorted(files)
+
+
+def test_session_pool_is_widened_once_and_custom_adapters_kept() -> None:
+    gl = gitlab.Gitlab("https://gitlab.example.com")
+    RepoAnalyzer(gl, "group/project")
+    adapter = gl.session.get_adapter("https://gitlab.example.com")
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == RepoAnalyzer.POOL_SIZE
+    # A second analyzer on the same client keeps the first one's pooled connections
+    RepoAnalyzer(gl, "group/project")
+    assert gl.session.get_adapter("https://gitlab.example.com") is adapter
+
+    custom = HTTPAdapter(max_retries=3)
+    gl = gitlab.Gitlab("https://gitlab.example.com")
+    gl.session.mount("https://", custom)
+    RepoAnalyzer(gl, "group/project")
+    assert gl.session.get_adapter("https://gitlab.example.com") is custom
+    http_adapter = gl.session.get_adapter("http://gitlab.example.com")
+    assert http_adapter.poolmanager.connection_pool_kw["maxsize"] == RepoAnalyzer.POOL_SIZE
+
+
+def test_has_priority_file_uses_entry_bits() -> None:
+    paths = ["SECURITY.md", "docs/policy.md", "src/app.py"]
+    snapshot = RepoSnapshot(
+        project_path="group/project",
+        default_branch="main",
+        files={path: RepoFile(path=path, content=b"") for path in paths},
+    )
+    assert snapshot.has_priority_file("SECURITY.md")
+    assert snapshot.has_priority_file("docs/")
+    assert not snapshot.has_priority_file("LICENSE")
+    with pytest.raises(ValueError, match="not a RepoAnalyzer.PRIORITY_FILES entry"):
+        snapshot.has_priority_file("docs/*")
+
+
+def test_re2_fallback_does_not_log(engine: str, capfd: pytest.CaptureFixture[str]) -> None:
+    snapshot = _snapshot({"app.py": "token = 'abc'\n"})
+    # Lookbehind: RE2 rejects it and the search falls back to stdlib re
+    assert snapshot.search_content(r"(?<=token = )'") == [("app.py", 1, "token = 'abc'")]
+    assert snapshot.search_many({"t": r"(?<=token = )'"})["t"] == [("app.py", 1, "token = 'abc'")]
+    assert "Error parsing" not in capfd.readouterr().err
+
+
+NON_ASCII_FILES = {"menu.md": "Café\n\nCRÈME brûlée\nnaïve\n"}
+
+
+@pytest.mark.parametrize("pattern", [r"é*$", r"CAFÉ", r"crème", r"[éè]\w+", r"ï"])
+def test_non_ascii_patterns_match_per_line_baseline(engine: str, pattern: str) -> None:
+    snapshot = _snapshot(NON_ASCII_FILES)
+    expected = _baseline_search(NON_ASCII_FILES, pattern)
+    assert snapshot.search_content(pattern) == expected
+    results = snapshot.search_many({"p": pattern, "ascii": "naive|brul"})
+    assert results["p"] == expected
+    assert results["ascii"] == _baseline_search(NON_ASCII_FILES, "naive|brul")
+
+
+MIXED_FILES = {
+    "app.py": "naïve_user = 1\npassword = 'x'\n",
+    "menu.md": "café\nZoë\n",
+    "ascii.py": "naive_user = 2\ncafe\n",
+}
+
+
+@pytest.mark.parametrize(
+    "pattern", [r"na\w+_user", r"caf\w\b", r"password\s*=", r"zo.$", r"^\w+$"],
+)
+def test_ascii_patterns_on_non_ascii_files_agree_across_search_paths(
+    engine: str, pattern: str,
+) -> None:
+    snapshot = _snapshot(MIXED_FILES)
+    expected = snapshot.search_content(pattern)
+    if engine == "stdlib":
+        assert expected == _baseline_search(MIXED_FILES, pattern)
+    assert snapshot.search_many({"p": pattern}) == {"p": expected}
+    # Batched with another pattern, so Hyperscan compiles a multi-pattern database
+    results = snapshot.search_many({"p": pattern, "other": "cafe"})
+    assert results["p"] == expected
+    assert results["other"] == _baseline_search(MIXED_FILES, "cafe")
+
+
+def test_unit_separator_matches_whitespace_like_str(engine: str) -> None:
+    snapshot = _snapshot({"a.txt": "a\x1fb\n"})
+    # RE2's \s is [\t\n\f\r ] whatever the input type; stdlib str \s includes \x1f
+    expected = [("a.txt", 1, "a\x1fb")] if repo_analyzer.re2 is None else []
+    assert snapshot.search_content(r"a\sb") == expected
+    assert snapshot.search_many({"p": r"a\sb"})["p"] == expected
+
+
+def test_text_searches_use_re2_when_installed(engine: str) -> None:
+    # Non-ASCII content takes the str path; it must keep RE2's linear-time matching
+    compiled = repo_analyzer._compile(r"(a+)+$", re.IGNORECASE)
+    assert isinstance(compiled, re.Pattern) == (engine == "stdlib")
+    snapshot = _snapshot({"menu.md": "café\n" + "a" * 27 + "!\n"})
+    assert snapshot.search_content(r"caf.") == [("menu.md", 1, "café")]
+
+
+def test_truncation_notice_keeps_content_ascii() -> None:
+    big = b"x" * (RepoAnalyzer.MAX_FILE_SIZE + 1)
+    gl = FakeGitlab({"big.txt": big})
+    content = RepoAnalyzer(gl, "group/project")._fetch_blobs(["big.txt"])["big.txt"]
+    assert content.startswith(b"[File too large:")
+    assert RepoFile(path="big.txt", content=content).byte_searchable
+
+
+MERGE_REQUESTS = [
+    {
+        "iid": 7, "title": "Enforce MFA", "author": "alice", "approvers": ["bob", "carol"],
+        "merged_at": "2026-01-02T03:04:05Z", "source_branch": "mfa", "target_branch": "main",
+    },
+    {
+        "iid": 6, "title": "Docs", "author": "dave", "approvers": [],
+        "merged_at": "2026-01-01T00:00:00Z", "source_branch": "docs", "target_branch": "main",
+    },
+]
+
+EXPECTED_MRS = [
+    MergeRequestInfo(
+        iid=7, title="Enforce MFA", author="alice", approvers=["bob", "carol"],
+        approver_count=2, merged_at="2026-01-02T03:04:05Z", has_ci_passed=True,
+        source_branch="mfa", target_branch="main",
+    ),
+    MergeRequestInfo(
+        iid=6, title="Docs", author="dave", approvers=[], approver_count=0,
+        merged_at="2026-01-01T00:00:00Z", has_ci_passed=True,
+        source_branch="docs", target_branch="main",
+    ),
+]
+
+
+def test_recent_mrs_come_from_one_graphql_request() -> None:
+    gl = FakeGitlab({})
+    gl.merge_requests = MERGE_REQUESTS
+    assert RepoAnalyzer(gl, "group/project")._get_recent_mrs() == EXPECTED_MRS
+    assert gl.graphql_posts == 1
+    assert gl.rest_calls == 0
+
+
+@pytest.mark.parametrize("mr_graphql", ["errors", "unavailable"])
+def test_recent_mrs_fall_back_to_rest(mr_graphql: str) -> None:
+    gl = FakeGitlab({})
+    gl.merge_requests = MERGE_REQUESTS
+    gl.mr_graphql = mr_graphql
+    assert RepoAnalyzer(gl, "group/project")._get_recent_mrs() == EXPECTED_MRS
+    # One list call plus one approvals call per MR
+    assert gl.rest_calls == 1 + len(MERGE_REQUESTS)
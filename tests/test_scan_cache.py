@@ -0,0 +1,117 @@
+"""Tests for the SQLite scan cache and how RepoAnalyzer.analyze uses it."""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from agent.scanners.repo_analyzer import RepoAnalyzer
+from agent.scanners.scan_cache import ScanCache
+from tests.fakes import FakeGitlab
+
+FILES = {
+    "SECURITY.md": b"Report issues to security@example.com\n",
+    "src/auth.py": b"PASSWORD_MIN_LENGTH = 12\n",
+    "docs/access.md": b"Access requires MFA\n",
+}
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[ScanCache]:
+    scan_cache = ScanCache(tmp_path / "cache.db")
+    yield scan_cache
+    scan_cache.close()
+
+
+def _analyze(gl: FakeGitlab, cache: ScanCache, **kwargs: object) -> dict[str, bytes]:
+    snapshot = RepoAnalyzer(gl, "group/project", cache=cache).analyze(**kwargs)
+    return {path: f.content for path, f in snapshot.files.items()}
+
+
+def test_miss_fetches_and_hit_reuses_snapshot(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    assert _analyze(gl, cache) == FILES
+    requests_after_miss = gl.tree_requests
+
+    assert _analyze(gl, cache) == FILES
+    assert gl.tree_requests == requests_after_miss
+
+
+def test_new_head_refetches_only_changed_blobs(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    _analyze(gl, cache)
+
+    gl.files["src/auth.py"] = b"PASSWORD_MIN_LENGTH = 16\n"
+    gl.head_sha = "def456"
+    gl.blob_requests.clear()
+    assert _analyze(gl, cache)["src/auth.py"] == b"PASSWORD_MIN_LENGTH = 16\n"
+    assert gl.blob_requests == [["src/auth.py"]]
+
+
+def test_failed_tree_listing_is_not_cached(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    gl.fail_tree = True
+    assert _analyze(gl, cache) == {}
+
+    gl.fail_tree = False
+    assert _analyze(gl, cache) == FILES
+
+
+def test_max_files_is_part_of_the_key(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    assert len(_analyze(gl, cache, max_files=1)) == 1
+    assert _analyze(gl, cache, max_files=200) == FILES
+
+
+def test_alternating_max_files_keeps_blob_cache(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    _analyze(gl, cache, max_files=200)
+    _analyze(gl, cache, max_files=1)
+
+    # New head, same blobs: nothing needs fetching for the larger selection
+    gl.head_sha = "def456"
+    gl.blob_requests.clear()
+    assert _analyze(gl, cache, max_files=200) == FILES
+    assert gl.blob_requests == []
+
+
+def test_force_bypasses_snapshot(cache: ScanCache) -> None:
+    gl = FakeGitlab(dict(FILES))
+    _analyze(gl, cache)
+    requests_after_miss = gl.tree_requests
+
+    _analyze(gl, cache, force=True)
+    assert gl.tree_requests > requests_after_miss
+
+
+def test_prune_blobs_keeps_only_the_current_tree(cache: ScanCache) -> None:
+    cache.put_blobs("group/project", [
+        ("a.md", "v1", b"old"), ("a.md", "v2", b"new"), ("b.md", "v1", b"b"),
+        ("gone.md", "v1", b"deleted"),
+    ])
+    cache.put_blobs("group/other", [("a.md", "v1", b"other")])
+
+    cache.prune_blobs("group/project", {"a.md": "v2", "b.md": "v1"})
+
+    assert cache.get_blobs("group/project", [("a.md", "v1"), ("a.md", "v2")]) == {"a.md": b"new"}
+    # Current blobs outside any one selection stay for scans that select them
+    assert cache.get_blobs("group/project", [("b.md", "v1")]) == {"b.md": b"b"}
+    assert cache.get_blobs("group/project", [("gone.md", "v1")]) == {}
+    assert cache.get_blobs("group/other", [("a.md", "v1")]) == {"a.md": b"other"}
+
+
+def test_unversioned_cache_file_is_rebuilt(tmp_path: Path) -> None:
+    # A file this module never initialized: user_version is SQLite's default 0
+    path = tmp_path / "cache.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE scan_cache (project_path TEXT PRIMARY KEY, snapshot_json TEXT)")
+    conn.commit()
+    conn.close()
+
+    reopened = ScanCache(path)
+    reopened.put_snapshot("group/project", "abc", 200, "{}")
+    assert reopened.get_snapshot("group/project", "abc", 200) == "{}"
+    reopened.close()
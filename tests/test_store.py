@@ -0,0 +1,82 @@
+"""Tests for the bounded in-memory scan store."""
+
+from __future__ import annotations
+
+import orjson
+from app.store import MemoryScanStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_put_get_and_get_json_round_trip() -> None:
+    store = MemoryScanStore()
+    record = {"scan_id": "a1", "status": "running", "result": None}
+    await store.put("a1", record)
+
+    assert await store.get("a1") == record
+    assert orjson.loads(await store.get_json("a1") or b"") == record
+    assert await store.get("missing") is None
+    assert await store.get_json("missing") is None
+
+
+async def test_update_merges_fields() -> None:
+    store = MemoryScanStore()
+    await store.put("a1", {"scan_id": "a1", "status": "running", "project_path": "g/p"})
+    await store.update("a1", status="completed", result={"score": 90})
+
+    assert await store.get("a1") == {
+        "scan_id": "a1", "status": "completed", "project_path": "g/p", "result": {"score": 90},
+    }
+
+
+async def test_list_json_returns_every_record() -> None:
+    store = MemoryScanStore()
+    await store.put("a1", {"scan_id": "a1"})
+    await store.put("b2", {"scan_id": "b2"})
+
+    records = sorted((orjson.loads(blob) for blob in await store.list_json()),
+                     key=lambda r: r["scan_id"])
+    assert records == [{"scan_id": "a1"}, {"scan_id": "b2"}]
+    assert sorted(r["scan_id"] for r in await store.list_all()) == ["a1", "b2"]
+
+
+async def test_least_recently_used_record_is_evicted() -> None:
+    store = MemoryScanStore(maxsize=2)
+    await store.put("a1", {"scan_id": "a1"})
+    await store.put("b2", {"scan_id": "b2"})
+    await store.get("a1")
+    await store.put("c3", {"scan_id": "c3"})
+
+    assert await store.get("b2") is None
+    assert await store.get("a1") is not None
+    assert await store.get("c3") is not None
+
+
+async def test_records_expire_after_ttl() -> None:
+    clock = FakeClock()
+    store = MemoryScanStore(ttl=60, timer=clock)
+    await store.put("a1", {"scan_id": "a1"})
+
+    clock.now = 61
+    assert await store.get("a1") is None
+    assert await store.list_json() == []
+
+
+async def test_update_after_eviction_keeps_the_result() -> None:
+    clock = FakeClock()
+    store = MemoryScanStore(ttl=60, timer=clock)
+    await store.put("a1", {"scan_id": "a1", "status": "running"})
+
+    # The scan outlives its "running" record
+    clock.now = 61
+    await store.update("a1", status="completed", result={"score": 90})
+
+    assert await store.get("a1") == {
+        "scan_id": "a1", "status": "completed", "result": {"score": 90},
+    }